@@ -1,13 +1,14 @@
+import re
+from pathlib import Path
 from typing import Callable
+from typing import Dict
 from typing import List
 from typing import Optional
 
-import PySimpleGUI as sg
-
 from ssg.settings import get_zk_link_contents_pattern
 from ssg.settings import settings
 from ssg.utils import logging
-from ssg.zettel import get_zettel_by_id_or_file_name
+from ssg.zettel import get_zettels_by_identifier
 from ssg.zettel import Zettel
 
 
@@ -15,8 +16,8 @@ md_linker_type = Callable[[Zettel, Zettel], str]
 
 
 def convert_links_from_zk_to_md(
-    zettels: List[Zettel] = [],
-    zettel_paths: List[str] = [],
+    zettels: Optional[List[Zettel]] = None,
+    zettel_paths: Optional[List[str]] = None,
     md_linker: md_linker_type = None,
 ) -> None:
     """Converts links in multiple zettels from the zk to the md format.
@@ -25,12 +26,12 @@ def convert_links_from_zk_to_md(
 
     Parameters
     ----------
-    zettels : List[Zettel]
+    zettels : List[Zettel], None
         All of the zettels to convert links in. Only needed if
-        zettel_paths is an empty list.
-    zettel_paths : List[str]
+        zettel_paths is empty. The list is not modified.
+    zettel_paths : List[str], None
         The paths of all the zettels to convert links in. Only needed if
-        zettels is an empty list. If both zettels and zettel_paths are
+        zettels is empty. If both zettels and zettel_paths are
         not empty, they will both be used.
     md_linker : Callable[[Zettel, Zettel], str], None
         A function that takes two zettels as arguments and returns a
@@ -38,25 +39,31 @@ def convert_links_from_zk_to_md(
         needed for custom link formatting or if the zettels are not in
         the same folder.
     """
+    zettels = list(zettels or [])
     if zettel_paths:
-        zettels.extend([Zettel(z) for z in zettel_paths])
+        zettels.extend(Zettel(z) for z in zettel_paths)
     if md_linker is None:
         md_linker = (
             lambda _, linked_z: f"[{linked_z.title}]({linked_z.file_name_and_ext})"
         )
+    zettels_by_identifier: Dict[str, Zettel] = get_zettels_by_identifier(zettels)
     for zettel in zettels:
-        convert_zettel_links_from_zk_to_md(zettel, zettels, md_linker)
+        convert_zettel_links_from_zk_to_md(
+            zettel, zettels, md_linker, zettels_by_identifier
+        )
 
 
 def convert_zettel_links_from_zk_to_md(
     zettel: Zettel,
     zettels: List[Zettel],
     md_linker: md_linker_type,
+    zettels_by_identifier: Optional[Dict[str, Zettel]] = None,
 ) -> None:
     """Converts links in one zettel from the zk to the md format.
 
     Shows a warning message if any of the internal links are broken. Also logs
-    warnings for links that are broken or have unexpected formats.
+    warnings for links that are broken or have unexpected formats. The zettel's
+    file is only rewritten if any links were converted.
 
     Parameters
     ----------
@@ -67,19 +74,65 @@ def convert_zettel_links_from_zk_to_md(
     md_linker : Callable[[Zettel, Zettel], str]
         A function that takes two zettels as arguments and returns a
         markdown link from the first zettel to the second one.
+    zettels_by_identifier : Dict[str, Zettel], None
+        The zettels keyed by every ID and file name that a zettel link could
+        refer to, as returned by get_zettels_by_identifier. Computed from
+        zettels if not given.
     """
     contents = get_contents(zettel)
     if not contents:
         return
+    new_contents = convert_links_in_text(
+        contents, zettel, zettels, md_linker, zettels_by_identifier
+    )
+    if new_contents != contents:
+        Path(zettel.path).write_text(new_contents, encoding="utf8")
+
+
+def convert_links_in_text(
+    contents: str,
+    zettel: Zettel,
+    zettels: List[Zettel],
+    md_linker: md_linker_type,
+    zettels_by_identifier: Optional[Dict[str, Zettel]] = None,
+) -> str:
+    """Converts links in a zettel's contents from the zk to the md format.
+
+    Returns the converted contents. Shows a warning message if any of the
+    internal links are broken. Also logs warnings for links that are broken or
+    have unexpected formats.
+
+    Parameters
+    ----------
+    contents : str
+        The contents of the zettel.
+    zettel : Zettel
+        The zettel that the contents are from.
+    zettels : List[Zettel]
+        All of the zettels that might be linked to.
+    md_linker : Callable[[Zettel, Zettel], str]
+        A function that takes two zettels as arguments and returns a
+        markdown link from the first zettel to the second one.
+    zettels_by_identifier : Dict[str, Zettel], None
+        The zettels keyed by every ID and file name that a zettel link could
+        refer to, as returned by get_zettels_by_identifier. Computed from
+        zettels if not given.
+    """
+    if settings["zk link start"] not in contents:
+        return contents
+    if zettels_by_identifier is None:
+        zettels_by_identifier = get_zettels_by_identifier(zettels)
     links_content: List[str] = get_zk_link_contents_pattern().findall(contents)
+    markdown_links: Dict[str, str] = dict()
+    broken_links: List[str] = []
     for link_content in set(links_content):
         link = f"{settings['zk link start']}{link_content}{settings['zk link end']}"
-        linked_z = get_zettel_by_id_or_file_name(link_content, zettels)
+        linked_z = zettels_by_identifier.get(link_content)
         if linked_z is None:
             logging.warning(
                 f'Broken link detected: "{link}" in "{zettel.title}" at {zettel.path}'
             )
-            sg.popup(f'Warning: broken internal link in "{zettel.title}": {link}')
+            broken_links.append(link)
             continue
         if linked_z.link not in contents and linked_z.alt_link not in contents:
             logging.warning(
@@ -88,10 +141,21 @@ def convert_zettel_links_from_zk_to_md(
                 f'  in "{zettel.title}" at {zettel.path}'
             )
         markdown_link = md_linker(zettel, linked_z)
-        contents = contents.replace(f"{link} {linked_z.title}", markdown_link)
-        contents = contents.replace(link, markdown_link)
-    with open(zettel.path, "w", encoding="utf8") as file:
-        file.write(contents)
+        markdown_links[f"{link} {linked_z.title}"] = markdown_link
+        markdown_links[link] = markdown_link
+    if broken_links:
+        import PySimpleGUI as sg
+
+        for link in broken_links:
+            sg.popup(f'Warning: broken internal link in "{zettel.title}": {link}')
+    if not markdown_links:
+        return contents
+    # Longer links are tried first so that a link followed by its zettel's title
+    # is replaced as a whole.
+    links_pattern = re.compile(
+        "|".join(map(re.escape, sorted(markdown_links, key=len, reverse=True)))
+    )
+    return links_pattern.sub(lambda match: markdown_links[match[0]], contents)
 
 
 def get_contents(zettel: Zettel) -> Optional[str]:
@@ -111,10 +175,7 @@ def get_contents(zettel: Zettel) -> Optional[str]:
         raises OSError.
     """
     try:
-        with open(zettel.path, "r", encoding="utf8") as file:
-            contents = file.read()
+        return Path(zettel.path).read_text(encoding="utf8")
     except OSError:
         logging.warning(f"  Zettel not found: `{zettel.title}` at {zettel.path}")
         return None
-    else:
-        return contents
@@ -1,17 +1,25 @@
+import mmap
 import os
 import re
 import shutil
-import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from itertools import repeat
+from pathlib import Path
+from typing import Dict
+from typing import Iterable
 from typing import List
-
-import PySimpleGUI as sg  # https://pysimplegui.readthedocs.io/en/latest/
-import send2trash  # https://pypi.org/project/Send2Trash/
+from typing import Optional
+from typing import Set
+from typing import Tuple
 
 from ssg.indexes import create_alphabetical_index_file
 from ssg.indexes import create_chronological_index_file
 from ssg.indexes import edit_categorical_index_file
 from ssg.reformat_html import reformat_html_files
 from ssg.reformat_zettels import reformat_zettels
+from ssg.settings import default_published_tag_pattern
 from ssg.settings import settings
 from ssg.settings import show_settings_window
 from ssg.settings import validate_settings
@@ -23,6 +31,43 @@ from ssg.zettel import Zettel
 
 # TODO: add a way to control the size of individual images on the site.
 
+# Escapes that only match ASCII characters in bytes patterns, inline flags, and
+# non-ASCII characters, any of which can make a bytes pattern match different
+# text than the str pattern with the same source.
+bytes_unsafe_pattern: re.Pattern = re.compile(
+    r"\\[wWsSdDbB]|\(\?[aiLmsux-]+[:)]|[^\x00-\x7f]"
+)
+
+# The published tag patterns that cannot match a zettel without the text
+# `#published`: the default pattern and the previous default, which may still be
+# saved in settings.json. Zettels without that text are skipped without being
+# decoded only if the published tag setting is one of these patterns.
+published_text_patterns: Set[str] = {
+    default_published_tag_pattern,
+    r"(?<=\s)#published(?=\s)",
+}
+
+# The text in style.css that precedes each color, and the setting for that color.
+css_color_setting_names: Dict[str, str] = {
+    "html body {\n    background-color: ": "body background color",
+    "header {\n    background-color: ": "header background color",
+    "nav a {\n    color: ": "header text color",
+    "nav a:hover {\n    color: ": "header hover color",
+    "main a {\n    color: ": "body link color",
+    "main a:hover {\n    color: ": "body hover color",
+}
+css_color_pattern: re.Pattern = re.compile(
+    "(" + "|".join(re.escape(p) for p in css_color_setting_names) + r")(.+)(?=;\n)"
+)
+
+# Maps the paths of zettels found while generating the site to their
+# modification times, their sizes, and the source of the published tag pattern
+# they were checked with, and to their contents if they match that pattern.
+# When the site is generated again in the same session, unchanged zettels are
+# not read again, so the contents of every published zettel stay in memory
+# until the app is closed.
+zettel_contents_cache: Dict[str, Tuple[Tuple[int, int, str], Optional[str]]] = dict()
+
 
 def generate_site() -> None:
     """Generates all the site's files."""
@@ -57,13 +102,16 @@ def generate_site() -> None:
 
     logging.info("Creating index files of all published zettels.")
     show_progress(60)
-    create_md_index_files(zettels, site_path, settings["hide chrono index dates"])
+    index_zettels: List[Zettel] = create_md_index_files(
+        zettels, site_path, settings["hide chrono index dates"]
+    )
 
     logging.info("Searching for any attachments that are linked to in the zettels.")
     show_progress(65)
     n: int = copy_attachments(zettels, site_pages_path)
     logging.info(f"Found {n} attachments and copied them to {site_pages_path}")
 
+    zettels = zettels + index_zettels
     reformat_zettels(zettels)
     show_progress(70)
     new_html_paths: List[str] = regenerate_html_files(
@@ -87,11 +135,12 @@ def generate_site() -> None:
 
 def create_md_index_files(
     zettels: List[Zettel], site_path: str, hide_chrono_index_dates: bool
-) -> None:
+) -> List[Zettel]:
     """Creates markdown files that list all the published zettels
 
     The files created are index.md and alphabetical-index.md. The file
-    categorical-index.md is also edited, and must already exist.
+    categorical-index.md is also edited, and must already exist. Returns the
+    zettels of the created files; the given list of zettels is not changed.
 
     Parameters
     ----------
@@ -103,8 +152,10 @@ def create_md_index_files(
         Whether to hide the dates in the chronological index.
     """
     edit_categorical_index_file(zettels)
-    create_alphabetical_index_file(zettels, site_path)
-    create_chronological_index_file(zettels, site_path, hide_chrono_index_dates)
+    return [
+        create_alphabetical_index_file(zettels, site_path),
+        create_chronological_index_file(zettels, site_path, hide_chrono_index_dates),
+    ]
 
 
 def regenerate_html_files(
@@ -129,8 +180,6 @@ def regenerate_html_files(
     )
     logging.info("Creating html files from the md files.")
     new_html_paths = create_html_files(zettels)
-    for i, path in enumerate(new_html_paths):
-        new_html_paths[i] = os.path.normpath(path)
 
     logging.info(
         "Deleting any HTML files that were not just generated and "
@@ -145,7 +194,7 @@ def create_html_files(zettels: List[Zettel]) -> List[str]:
     """Creates HTML files from markdown files into the site folder
 
     Expects the zettels to already be in the site folder. Returns all
-    the new HTML files' paths.
+    the new HTML files' normalized paths.
 
     Parameters
     ----------
@@ -170,17 +219,30 @@ def copy_attachments(zettels: List[Zettel], site_pages_path: str) -> int:
         The path to the pages folder within the site folder.
     """
     attachment_paths = get_all_attachment_paths(zettels)
-    for path in attachment_paths:
-        try:
-            shutil.copy(path, site_pages_path)
-        except shutil.SameFileError:
-            _, file_name = os.path.split(path)
-            logging.info(f"  Did not copy {file_name} because it is already there.")
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        list(executor.map(copy_attachment, attachment_paths, repeat(site_pages_path)))
     # TODO: find and request to delete unused attachments
 
     return len(attachment_paths)
 
 
+def copy_attachment(path: str, site_pages_path: str) -> None:
+    """Copies one file into the site folder unless it is already there.
+
+    Parameters
+    ----------
+    path : str
+        The path to the file to copy.
+    site_pages_path : str
+        The path to the pages folder within the site folder.
+    """
+    try:
+        shutil.copy(path, site_pages_path)
+    except shutil.SameFileError:
+        _, file_name = os.path.split(path)
+        logging.info(f"  Did not copy {file_name} because it is already there.")
+
+
 def copy_zettels_to_site_folder(
     zettels: List[Zettel], site_path: str, site_pages_path: str
 ) -> List[Zettel]:
@@ -198,7 +260,7 @@ def copy_zettels_to_site_folder(
         The path to the pages folder within the site folder.
     """
     for i, zettel in enumerate(zettels):
-        if zettel.file_name not in settings["root pages"]:
+        if not zettel.is_root_page:
             new_path = shutil.copy(zettel.path, site_pages_path)
             zettels[i].path = new_path
         else:
@@ -214,15 +276,17 @@ def get_zettels_to_publish(zettelkasten_path: str) -> List[Zettel]:
     ----------
     zettelkasten_path : str
         The path to the zettelkasten folder."""
-    zettel_paths = get_paths_of_zettels_to_publish(zettelkasten_path)
-    zettels = []
-    for path in zettel_paths:
-        zettels.append(Zettel(path))
-    return zettels
+    contents_by_path = get_contents_of_zettels_to_publish(zettelkasten_path)
+    return [Zettel(path, contents) for path, contents in contents_by_path.items()]
+
 
+def get_contents_of_zettels_to_publish(zettelkasten_path: str) -> Dict[str, str]:
+    """Gets the paths and contents of all zettels that contain '#published'.
 
-def get_paths_of_zettels_to_publish(zettelkasten_path: str) -> List[str]:
-    """Gets the paths of all zettels that contain '#published'.
+    The returned dict's keys are the zettels' paths and its values are the
+    zettels' contents, so the zettels do not need to be read again. Zettels
+    that have not changed since the last call with the same published tag
+    pattern are taken from zettel_contents_cache instead of being read again.
 
     Parameters
     ----------
@@ -230,22 +294,95 @@ def get_paths_of_zettels_to_publish(zettelkasten_path: str) -> List[str]:
         The path to the zettelkasten folder.
     """
     zettel_paths = get_file_paths(zettelkasten_path, settings["zettel file types"])
-    zettels_to_publish = []
+    zettels_to_publish: Dict[str, str] = dict()
+    published_tag_pattern: re.Pattern = settings["patterns"]["published tag"]
+    published_text: Optional[bytes] = None
+    if published_tag_pattern.pattern in published_text_patterns:
+        published_text = b"#published"
     progress_conversion_ratio = 39 / len(zettel_paths)
     iter_count = 0
-    for i, zettel_path in enumerate(zettel_paths):
-        contents = get_file_contents(zettel_path, "utf8")
-        match = settings["patterns"]["published tag"].search(contents)
-        if match:
-            zettels_to_publish.append(zettel_path)
-        if iter_count == 500:
-            iter_count = 0
-            show_progress(10 + i * progress_conversion_ratio)  # range: 10 to <= 49
-        else:
-            iter_count += 1
+    with ThreadPoolExecutor() as executor:
+        scans = executor.map(
+            scan_zettel,
+            zettel_paths,
+            repeat(published_tag_pattern.pattern),
+            repeat(published_text),
+        )
+        for i, (zettel_path, scan) in enumerate(zip(zettel_paths, scans)):
+            signature, is_candidate = scan
+            if is_candidate is None:
+                _, contents = zettel_contents_cache[zettel_path]
+            else:
+                contents = None
+                if is_candidate:
+                    contents = get_file_contents(zettel_path, "utf8")
+                    if not published_tag_pattern.search(contents):
+                        contents = None
+                zettel_contents_cache[zettel_path] = (signature, contents)
+            if contents is not None:
+                zettels_to_publish[zettel_path] = contents
+            if iter_count == 500:
+                iter_count = 0
+                show_progress(10 + i * progress_conversion_ratio)  # range: 10 to <= 49
+            else:
+                iter_count += 1
+    for removed_path in zettel_contents_cache.keys() - set(zettel_paths):
+        del zettel_contents_cache[removed_path]
     return zettels_to_publish
 
 
+def scan_zettel(
+    zettel_path: str, pattern_source: str, published_text: Optional[bytes]
+) -> Tuple[Tuple[int, int, str], Optional[bool]]:
+    """Gets a file's cache signature and whether it might be published.
+
+    The signature is the file's modification time and size and the published
+    tag pattern's source. Whether the file might be published is None if the
+    signature matches the file's entry in zettel_contents_cache, in which case
+    the file is not opened.
+
+    Parameters
+    ----------
+    zettel_path : str
+        The path to the file to check.
+    pattern_source : str
+        The source of the published tag pattern, so that files checked with a
+        different pattern are checked again.
+    published_text : bytes, None
+        Text that every published file contains. If None, every file might be
+        published.
+    """
+    stat = os.stat(zettel_path)
+    signature = (stat.st_mtime_ns, stat.st_size, pattern_source)
+    cached = zettel_contents_cache.get(zettel_path)
+    if cached is not None and cached[0] == signature:
+        return signature, None
+    if published_text is None:
+        return signature, True
+    return signature, contains_published_text(zettel_path, published_text)
+
+
+def contains_published_text(zettel_path: str, published_text: bytes) -> bool:
+    """Quickly checks whether a file contains some text anywhere.
+
+    The file is searched as raw bytes through a memory map without being
+    decoded. A file that contains the text might still not match the
+    published tag pattern, but a file that does not contain it never will.
+
+    Parameters
+    ----------
+    zettel_path : str
+        The path to the file to check.
+    published_text : bytes
+        The text that every published file contains.
+    """
+    with open(zettel_path, "rb") as file:
+        if not os.fstat(file.fileno()).st_size:
+            return False
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            return contents.find(published_text) != -1
+
+
 def delete_site_md_files(site_pages_path: str) -> None:
     """Permanently deletes all the markdown files in the site folder.
 
@@ -255,8 +392,8 @@ def delete_site_md_files(site_pages_path: str) -> None:
         The path to the site folder.
     """
     md_paths = get_file_paths(site_pages_path, settings["zettel file types"])
-    for path in md_paths:
-        os.remove(path)
+    with ThreadPoolExecutor() as executor:
+        list(executor.map(lambda path: Path(path).unlink(missing_ok=True), md_paths))
 
 
 def get_file_paths(dir_path: str, file_extensions: List[str]) -> List[str]:
@@ -272,57 +409,105 @@ def get_file_paths(dir_path: str, file_extensions: List[str]) -> List[str]:
         The file extensions to filter by. All letters must be lowercase.
         Including the extension's leading period is recommended.
     """
-    file_names = os.listdir(dir_path)
-    file_paths = []
-    for file_name in file_names:
-        for extension in file_extensions:
-            if file_name.lower().endswith(extension):
-                file_path = os.path.join(dir_path, file_name)
-                file_paths.append(file_path)
-    return file_paths
+    file_extensions = tuple(file_extensions)
+    with os.scandir(dir_path) as entries:
+        return [
+            entry.path
+            for entry in entries
+            if entry.name.lower().endswith(file_extensions) and entry.is_file()
+        ]
 
 
-def get_attachment_paths(contents: str, folder_path: str) -> List[str]:
-    """Gets all absolute and relative paths to files and folders in markdown links.
+def resolve_paths(paths: Iterable[str], folder_path: str) -> List[str]:
+    """Normalizes paths found in markdown links, without checking they exist.
+
+    Relative paths are joined to the folder path first. Duplicates are removed
+    and the paths keep their original order.
 
     Parameters
     ----------
-    contents : str
-        The contents of the markdown file to search in.
+    paths : Iterable[str]
+        The absolute and/or relative paths found in markdown links.
     folder_path : str
         The absolute path to the folder containing the markdown file.
-
-    Returns
-    -------
-    List[str]
-        A list of paths to files and/or folders.
     """
-    file_paths: List[str] = []
-    paths: List[str] = settings["patterns"]["link path"].findall(contents)
-    for path in paths:
-        file_path = os.path.join(folder_path, path)
-        file_path = os.path.normpath(file_path)
-        if os.path.exists(file_path):
-            file_paths.append(file_path)
-    return file_paths
+    return list(
+        dict.fromkeys(os.path.normpath(os.path.join(folder_path, p)) for p in paths)
+    )
 
 
 def get_all_attachment_paths(zettels: List[Zettel]) -> List[str]:
-    """Gets the file and folder attachment paths in multiple zettels.
+    """Gets the unique file and folder attachment paths in multiple zettels.
 
-    Both absolute and relative paths are included.
+    Both absolute and relative paths are included. A file linked to from more
+    than one zettel is only listed once, and whether each path exists is only
+    checked once.
 
     Parameters
     ----------
     zettels : List[Zettel]
         The zettels from which to get the file and folder attachment paths.
     """
-    all_attachment_paths = []
-    for zettel in zettels:
-        with open(zettel.path, "r", encoding="utf8") as file:
-            contents = file.read()
-        all_attachment_paths.extend(get_attachment_paths(contents, zettel.folder_path))
-    return all_attachment_paths
+    with ThreadPoolExecutor() as executor:
+        link_paths = executor.map(get_zettel_link_paths, zettels)
+        unique_paths = list(dict.fromkeys(chain.from_iterable(link_paths)))
+        exists = executor.map(os.path.exists, unique_paths)
+        return [path for path, path_exists in zip(unique_paths, exists) if path_exists]
+
+
+def get_zettel_link_paths(zettel: Zettel) -> List[str]:
+    """Gets the normalized paths in one zettel's markdown links.
+
+    The paths are not checked for existence. If the link path pattern can
+    search bytes, the file is memory-mapped rather than read into a string, so
+    large zettels are scanned without being decoded first.
+
+    Parameters
+    ----------
+    zettel : Zettel
+        The zettel from which to get the link paths.
+    """
+    link_path_pattern: re.Pattern = settings["patterns"]["link path"]
+    link_path_bytes_pattern = get_bytes_pattern(link_path_pattern.pattern)
+    if link_path_bytes_pattern is not None:
+        paths: Optional[List[str]] = None
+        with open(zettel.path, "rb") as file:
+            if not os.fstat(file.fileno()).st_size:
+                return []
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+                try:
+                    paths = [
+                        match[0].decode("utf8")
+                        for match in link_path_bytes_pattern.finditer(contents)
+                    ]
+                except UnicodeDecodeError:
+                    pass
+        if paths is not None:
+            return resolve_paths(paths, zettel.folder_path)
+    contents = get_file_contents(zettel.path, "utf8")
+    paths = [match[0] for match in link_path_pattern.finditer(contents)]
+    return resolve_paths(paths, zettel.folder_path)
+
+
+@lru_cache(maxsize=None)
+def get_bytes_pattern(pattern_source: str) -> Optional[re.Pattern]:
+    """Compiles a str pattern's source into a pattern for utf8-encoded bytes.
+
+    Returns None if the bytes pattern might match different text than the str
+    pattern, such as if it uses ``\\w`` or ``\\s``, which only match ASCII
+    characters in bytes patterns, or if it cannot be compiled.
+
+    Parameters
+    ----------
+    pattern_source : str
+        The source of the str pattern.
+    """
+    if bytes_unsafe_pattern.search(pattern_source):
+        return None
+    try:
+        return re.compile(pattern_source.encode("utf8"))
+    except re.error:
+        return None
 
 
 def check_style(site_path: str) -> None:
@@ -353,34 +538,43 @@ def update_css(site_style_path: str) -> None:
     site_style_path : str
         The path to the site's style.css.
     """
-    with open(site_style_path, "r", encoding="utf8") as file:
-        contents = file.read()
+    contents = Path(site_style_path).read_text(encoding="utf8")
+    colors = tuple(settings[name] for name in css_color_setting_names.values())
+    new_contents = replace_css_colors(contents, colors)
+    if new_contents == contents:
+        return
+    Path(site_style_path).write_text(new_contents, encoding="utf8")
 
-    body_color_pattern = re.compile(
-        r"(?<=html body {\n    background-color: ).+(?=;\n)"
-    )
-    header_color_pattern = re.compile(r"(?<=header {\n    background-color: ).+(?=;\n)")
-    header_text_color_pattern = re.compile(r"(?<=nav a {\n    color: ).+(?=;\n)")
-    header_hover_color_pattern = re.compile(r"(?<=nav a:hover {\n    color: ).+(?=;\n)")
-    body_link_color_pattern = re.compile(r"(?<=main a {\n    color: ).+(?=;\n)")
-    body_hover_color_pattern = re.compile(r"(?<=main a:hover {\n    color: ).+(?=;\n)")
-
-    color_patterns = [
-        (body_color_pattern, settings["body background color"]),
-        (header_color_pattern, settings["header background color"]),
-        (header_text_color_pattern, settings["header text color"]),
-        (header_hover_color_pattern, settings["header hover color"]),
-        (body_link_color_pattern, settings["body link color"]),
-        (body_hover_color_pattern, settings["body hover color"]),
-    ]
 
-    for p, s in color_patterns:
-        contents, n = p.subn(s, contents, 1)
-        if not n:
-            raise ValueError
+@lru_cache(maxsize=8)
+def replace_css_colors(contents: str, colors: Tuple[str, ...]) -> str:
+    """Replaces the colors in the contents of style.css.
 
-    with open(site_style_path, "w", encoding="utf8") as file:
-        file.write(contents)
+    Only the first occurrence of each color's selector is changed. Raises
+    ValueError if any of the selectors cannot be found.
+
+    Parameters
+    ----------
+    contents : str
+        The contents of style.css.
+    colors : Tuple[str, ...]
+        The new colors, in the same order as the settings in
+        css_color_setting_names.
+    """
+    color_by_prefix = dict(zip(css_color_setting_names, colors))
+    replaced_prefixes = set()
+
+    def replace_color(match: re.Match) -> str:
+        prefix = match[1]
+        if prefix in replaced_prefixes:
+            return match[0]
+        replaced_prefixes.add(prefix)
+        return prefix + color_by_prefix[prefix]
+
+    contents = css_color_pattern.sub(replace_color, contents)
+    if len(replaced_prefixes) < len(color_by_prefix):
+        raise ValueError
+    return contents
 
 
 def delete_old_html_files(
@@ -397,32 +591,33 @@ def delete_old_html_files(
         The paths of HTML files present before the #published zettels were
         converted to HTML.
     new_html_paths : List[str]
-        The paths of the new HTML files created from the #published zettels.
+        The normalized paths of the new HTML files created from the #published
+        zettels.
     site_pages_path : str
         The path to the site's pages folder.
     """
     file_name = os.path.join(site_pages_path, "ssg-ignore.txt")
     try:
         with open(file_name, "r", encoding="utf8") as file:
-            ignored_html_paths = file.read().split("\n")
+            ignored_path_set: Set[str] = {
+                os.path.normpath(line.rstrip("\r\n")) for line in file if line.strip()
+            }
     except FileNotFoundError:
         logging.info("  ssg-ignore.txt not found")
-        ignored_html_paths = []
+        ignored_path_set = set()
 
-    for i, path in enumerate(ignored_html_paths):
-        ignored_html_paths[i] = os.path.normpath(path)
+    new_path_set: Set[str] = set(new_html_paths)
+    old_html_paths = list(dict.fromkeys(os.path.normpath(p) for p in old_html_paths))
 
     old_count = 0
     for old_path in old_html_paths:
-        old_path = os.path.normpath(old_path)
         if (
-            old_path not in new_html_paths
-            and not old_path.endswith("footer.html")
-            and not old_path.endswith("header.html")
+            old_path not in new_path_set
+            and not old_path.endswith(("footer.html", "header.html"))
+            and old_path not in ignored_path_set
         ):
-            if old_path not in ignored_html_paths:
-                old_count += 1
-                show_delete_confirmation_menu(old_path)
+            old_count += 1
+            show_delete_confirmation_menu(old_path)
     if not old_count:
         logging.info("No old HTML files found.")
     else:
@@ -431,6 +626,11 @@ def delete_old_html_files(
 
 def show_delete_confirmation_menu(old_path: str) -> None:
     """Requests to open, delete, or save an HTML file and handles those events."""
+    import webbrowser
+
+    import PySimpleGUI as sg  # https://pysimplegui.readthedocs.io/en/latest/
+    import send2trash  # https://pypi.org/project/Send2Trash/
+
     layout = [
         [sg.Text(f"Old HTML file found: {old_path}.\nReady to move to trash.")],
         [sg.Open(), sg.Button("Delete"), sg.Cancel()],
@@ -1,9 +1,13 @@
 import os
+import re
 import sys
+from operator import attrgetter
+from operator import itemgetter
+from pathlib import Path
 from typing import Dict
 from typing import List
-
-import PySimpleGUI as sg
+from typing import Set
+from typing import Tuple
 
 from ssg.settings import settings
 from ssg.zettel import Zettel
@@ -21,33 +25,43 @@ def edit_categorical_index_file(zettels: List[Zettel]) -> None:
     zettels : List[Zettel]
         The zettels to list.
     """
-    index_zettel: Zettel | None = None
-    for zettel in zettels:
-        if "categorical-index.md" == zettel.file_name_and_ext:
-            index_zettel = zettel
+    index_zettel: Zettel | None = next(
+        (z for z in zettels if z.file_name_and_ext == "categorical-index.md"), None
+    )
     if index_zettel is None:
+        import PySimpleGUI as sg
+
         sg.popup("categorical-index.md is required but was not found.")
         print("categorical-index.md is required but was not found.")
         sys.exit(1)
-    with open(index_zettel.path, "r", encoding="utf8") as file:
-        index_contents: str = file.read()
-    index_tags: List[str] = settings["patterns"]["tag"].findall(index_contents)
+    index_contents: str = Path(index_zettel.path).read_text(encoding="utf8")
+    tag_pattern: re.Pattern = settings["patterns"]["tag"]
+    index_tags: Dict[str, None] = dict.fromkeys(tag_pattern.findall(index_contents))
     if "#published" not in index_tags:
+        import PySimpleGUI as sg
+
         sg.popup("categorical-index.md must have the #published tag.")
         print("categorical-index.md must have the #published tag.")
         sys.exit(1)
-    index_tags.remove("#published")
-    categories: Dict[str, str] = create_categorical_indexes(zettels, index_tags)
-    for tag, links in categories.items():
-        index_contents = index_contents.replace(tag, links, 1)
-    with open(index_zettel.path, "w", encoding="utf8") as file:
-        file.write(index_contents)
+    del index_tags["#published"]
+    categories: Dict[str, str] = create_categorical_indexes(zettels, list(index_tags))
+    replaced_tags: Set[str] = set()
+
+    def replace_tag(match: re.Match) -> str:
+        tag = match[0]
+        if tag not in categories or tag in replaced_tags:
+            return tag
+        replaced_tags.add(tag)
+        return categories[tag]
 
+    index_contents = tag_pattern.sub(replace_tag, index_contents)
+    Path(index_zettel.path).write_text(index_contents, encoding="utf8")
 
-def create_alphabetical_index_file(zettels: List[Zettel], site_path: str) -> None:
+
+def create_alphabetical_index_file(zettels: List[Zettel], site_path: str) -> Zettel:
     """Lists all the zettels alphabetically in a new markdown file.
 
-    The file will be created in the site folder.
+    The file will be created in the site folder. Returns the new file's zettel.
 
     Parameters
     ----------
@@ -58,17 +72,16 @@ def create_alphabetical_index_file(zettels: List[Zettel], site_path: str) -> Non
     """
     index: str = create_alphabetical_index(zettels)
     index_file_path: str = os.path.join(site_path, "alphabetical-index.md")
-    with open(index_file_path, "w", encoding="utf8") as file:
-        file.write(index)
-    zettels.append(Zettel(index_file_path))
+    Path(index_file_path).write_text(index, encoding="utf8")
+    return Zettel(index_file_path, index)
 
 
 def create_chronological_index_file(
     zettels: List[Zettel], site_path: str, hide_chrono_index_dates: bool
-) -> None:
+) -> Zettel:
     """Lists all the zettels chronologically in a new markdown file.
 
-    The file will be created in the site folder.
+    The file will be created in the site folder. Returns the new file's zettel.
 
     Parameters
     ----------
@@ -81,9 +94,8 @@ def create_chronological_index_file(
     """
     index: str = create_chronological_index(zettels, hide_chrono_index_dates)
     index_file_path: str = os.path.join(site_path, "index.md")
-    with open(index_file_path, "w", encoding="utf8") as file:
-        file.write(index)
-    zettels.append(Zettel(index_file_path))
+    Path(index_file_path).write_text(index, encoding="utf8")
+    return Zettel(index_file_path, index)
 
 
 def create_categorical_indexes(
@@ -101,23 +113,19 @@ def create_categorical_indexes(
     index_tags : List[str]
         The tags to categorize.
     """
-    categories: Dict[list] = dict()
-    unlinked_zettels: List[Zettel] = list(zettels)
-    for index_tag in index_tags:
-        categories[index_tag] = []
-        for zettel in zettels:
-            if zettel.file_name not in settings["root pages"]:
-                if index_tag in zettel.tags:
-                    categories[index_tag].append("* " + zettel.link)
-                    unlinked_zettels.remove(zettel)
-    for zettel in unlinked_zettels:
-        if zettel.file_name not in settings["root pages"]:
-            if "#other" not in categories:
-                categories["#other"] = []
-            categories["#other"].append("* " + zettel.link)
-    for key, value in categories.items():
-        categories[key] = "\n".join(value)
-    return categories
+    categories: Dict[list] = {index_tag: [] for index_tag in index_tags}
+    index_tag_set: Set[str] = set(index_tags)
+    other_links: List[str] = []
+    for zettel in get_non_root_zettels(zettels):
+        zettel_index_tags = index_tag_set.intersection(zettel.tags)
+        list_item = f"* {zettel.link}"
+        for index_tag in zettel_index_tags:
+            categories[index_tag].append(list_item)
+        if not zettel_index_tags:
+            other_links.append(list_item)
+    if other_links:
+        categories.setdefault("#other", []).extend(other_links)
+    return {tag: "\n".join(list_items) for tag, list_items in categories.items()}
 
 
 def create_alphabetical_index(zettels: List[Zettel]) -> str:
@@ -130,11 +138,11 @@ def create_alphabetical_index(zettels: List[Zettel]) -> str:
     zettels : List[Zettel]
         The zettels to list.
     """
-    numeric_links = []
-    sorted_zettels = sorted(zettels, key=lambda z: z.title.lower())
-    for zettel in sorted_zettels:
-        if zettel.file_name not in settings["root pages"]:
-            numeric_links.append("* " + zettel.link)
+    titled_zettels: List[Tuple[str, Zettel]] = [
+        (zettel.title.lower(), zettel) for zettel in get_non_root_zettels(zettels)
+    ]
+    titled_zettels.sort(key=itemgetter(0))
+    numeric_links = [f"* {zettel.link}" for _, zettel in titled_zettels]
     zettel_index = "## alphabetical index\n\n" + "\n".join(numeric_links)
     return zettel_index
 
@@ -153,20 +161,17 @@ def create_chronological_index(
     hide_chrono_index_dates : bool
         Whether to hide the dates in the chronological index.
     """
-    z_with_id_links: List[str] = []
-    non_root_zettels: List[Zettel] = [
-        zettel for zettel in zettels if zettel.file_name not in settings["root pages"]
-    ]
+    non_root_zettels: List[Zettel] = get_non_root_zettels(zettels)
     zettels_with_ids: List[Zettel] = [
         zettel for zettel in non_root_zettels if zettel.id is not None
     ]
-    zettels_with_ids = sorted(zettels_with_ids, key=lambda z: z.id, reverse=True)
+    zettels_with_ids.sort(key=attrgetter("id"), reverse=True)
     if hide_chrono_index_dates:
-        z_with_id_links.extend(["* " + zettel.link for zettel in zettels_with_ids])
+        z_with_id_links: List[str] = [f"* {z.link}" for z in zettels_with_ids]
     else:
-        for zettel in zettels_with_ids:
-            date: str = f"{zettel.id[0:4]}/{zettel.id[4:6]}/{zettel.id[6:8]}"
-            z_with_id_links.append("* " + date + " " + zettel.link)
+        z_with_id_links = [
+            f"* {z.id[:4]}/{z.id[4:6]}/{z.id[6:8]} {z.link}" for z in zettels_with_ids
+        ]
     zettel_index: List[str] = []
     if not hide_chrono_index_dates:
         zettel_index.append(
@@ -178,8 +183,19 @@ def create_chronological_index(
         zettel for zettel in non_root_zettels if zettel.id is None
     ]
     z_without_id_links: List[str] = [
-        "* " + zettel.link for zettel in zettels_without_ids
+        f"* {zettel.link}" for zettel in zettels_without_ids
     ]
     if z_without_id_links:
         zettel_index.append("\n\n### undated pages\n\n" + "\n".join(z_without_id_links))
     return "".join(zettel_index)
+
+
+def get_non_root_zettels(zettels: List[Zettel]) -> List[Zettel]:
+    """Gets the zettels that are not root pages, in their original order.
+
+    Parameters
+    ----------
+    zettels : List[Zettel]
+        The zettels to filter.
+    """
+    return [zettel for zettel in zettels if not zettel.is_root_page]
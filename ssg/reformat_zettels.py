@@ -1,65 +1,114 @@
+import re
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
+from pathlib import Path
+from typing import Dict
 from typing import List
+from typing import Optional
+from typing import Tuple
 
-from ssg.convert_links import convert_links_from_zk_to_md
+from ssg.convert_links import convert_links_in_text
 from ssg.settings import settings
+from ssg.utils import combine_patterns
+from ssg.utils import get_file_contents
 from ssg.utils import logging
-from ssg.utils import replace_pattern
+from ssg.utils import replace_patterns_in_text
+from ssg.zettel import get_zettels_by_identifier
 from ssg.zettel import Zettel
 
 
 def reformat_zettels(zettels: List[Zettel]) -> None:
     """Convert file links and remove tags.
 
-    Convert any file links to absolute markdown-style HTML links, and remove
-    all tags from the files if the setting to hide tags is True.
+    Convert any file links to absolute markdown-style HTML links, remove all
+    tags from the files if the setting to hide tags is True, and convert links
+    between zettels from the zk to the md format. Each zettel is read once and
+    written at most once. The zettels are read in other threads.
 
     Parameters
     ----------
     zettels : List[Zettel]
         The list of zettels to reformat.
     """
-    make_file_paths_relative(zettels)
-    if settings["hide tags"]:
-        remove_all_tags(zettels)
     logging.info("Converting internal links from the zk to the md format.")
     md_linker = md_linker_creator()
-    convert_links_from_zk_to_md(zettels, md_linker=md_linker)
-    redirect_links_from_md_to_html(zettels)
-
-
-def make_file_paths_relative(zettels: List[Zettel]) -> None:
-    """Converts all absolute file paths to relative file paths.
-
-    Parameters
-    ----------
-    zettels : List[Zettel]
-        The zettels to change the paths in.
-    """
-    zettel_paths = [z.path for z in zettels]
-    n = replace_pattern(
-        settings["patterns"]["absolute attachment link"],
-        r"\1",
-        zettel_paths,
-        file_must_exist=True,
+    zettels_by_identifier: Dict[str, Zettel] = get_zettels_by_identifier(zettels)
+    with ThreadPoolExecutor() as executor:
+        all_contents: List[str] = list(
+            executor.map(get_file_contents, [z.path for z in zettels], repeat("utf8"))
+        )
+    counts: Counter = Counter()
+    for zettel, contents in zip(zettels, all_contents):
+        new_contents, zettel_counts = reformat_text(contents)
+        counts.update(zettel_counts)
+        if new_contents:
+            new_contents = convert_links_in_text(
+                new_contents, zettel, zettels, md_linker, zettels_by_identifier
+            )
+        if new_contents != contents:
+            Path(zettel.path).write_text(new_contents, encoding="utf8")
+    logging.info(
+        f"Converted {counts['relative']} absolute file paths to relative file paths."
+    )
+    if settings["hide tags"]:
+        logging.info(f"Removed {counts['tag']} tags.")
+    logging.info(
+        f"Converted {counts['md_ext']} internal links from ending with `.md` to "
+        "ending with `.html`."
     )
-    logging.info(f"Converted {n} absolute file paths to relative file paths.")
 
 
-def remove_all_tags(zettels: List[Zettel]) -> None:
-    """Removes all tags from the zettels.
+def reformat_text(contents: str) -> Tuple[str, Counter]:
+    """Converts file links and removes tags in the contents of a zettel.
 
-    Logs a message saying how many tags were removed.
+    Returns the new contents and the number of absolute file paths made
+    relative, tags removed, and links redirected from `.md` to `.html`, keyed
+    by "relative", "tag", and "md_ext" respectively.
 
     Parameters
     ----------
-    zettels : List[Zettel]
-        The zettels to remove the tags from.
+    contents : str
+        The contents of the zettel.
     """
-    zettel_paths = [z.path for z in zettels]
-    n = replace_pattern(settings["patterns"]["tag"], "", zettel_paths)
-    logging.info(f"Removed {n} tags.")
+    patterns: Dict[str, re.Pattern] = dict()
+    new_text: Dict[str, str] = dict()
+    if settings["hide tags"]:
+        patterns["tag"] = settings["patterns"]["tag"]
+        new_text["tag"] = ""
+    patterns["md_ext"] = settings["patterns"]["md ext in link"]
+    new_text["md_ext"] = ".html"
+    counts: Counter = Counter()
 
+    def reformat_match(match: re.Match, name: Optional[str] = None) -> str:
+        """Returns the replacement for the pattern that matched.
 
+        The pattern's name is the match's lastgroup unless it is given.
+        """
+        name = name or match.lastgroup
+        counts[name] += 1
+        return new_text[name]
+
+    combined_pattern = combine_patterns(patterns)
+    if combined_pattern is not None:
+        replacements = [(combined_pattern, reformat_match, False)]
+    else:
+        replacements = [
+            (pattern, partial(reformat_match, name=name), False)
+            for name, pattern in patterns.items()
+        ]
+    contents, (counts["relative"], *_) = replace_patterns_in_text(
+        [
+            (settings["patterns"]["absolute attachment link"], r"\1", True),
+            *replacements,
+        ],
+        contents,
+    )
+    return contents, counts
+
+
+# TODO: somehow allow linking to markdown files that will remain markdown files.
 def md_linker_creator() -> str:
     """Creates an md linker creator for zettels in multiple folders."""
 
@@ -68,6 +117,7 @@ def md_linker_creator() -> str:
 
         Prefixes the links with the internal HTML link prefix chosen in settings and
         correctly determines whether to point the link to a file in the pages folder.
+        The link points to the HTML file that will be generated from the zettel.
 
         Parameters
         ----------
@@ -76,36 +126,16 @@ def md_linker_creator() -> str:
         linked_zettel : Zettel
             The zettel that the link is to.
         """
-        if (
-            linked_zettel.file_name not in settings["root pages"]
-            and zettel.file_name in settings["root pages"]
-        ):
+        if not linked_zettel.is_root_page and zettel.is_root_page:
             markdown_link = (
                 f"[{settings['internal html link prefix']}{linked_zettel.title}]"
-                f"({settings['site subfolder name']}/{linked_zettel.file_name_and_ext})"
+                f"({settings['site subfolder name']}/{linked_zettel.file_name}.html)"
             )
         else:
             markdown_link = (
                 f"[{settings['internal html link prefix']}{linked_zettel.title}]"
-                f"({linked_zettel.file_name_and_ext})"
+                f"({linked_zettel.file_name}.html)"
             )
         return markdown_link
 
     return create_markdown_link
-
-
-# TODO: somehow allow linking to markdown files that will remain markdown files.
-def redirect_links_from_md_to_html(zettels: List[Zettel]) -> None:
-    """Changes links from pointing to markdown files to HTML files.
-
-    Parameters
-    ----------
-    zettels : List[Zettel]
-        The zettels to change the links in.
-    """
-    zettel_paths = [z.path for z in zettels]
-    n = replace_pattern(settings["patterns"]["md ext in link"], ".html", zettel_paths)
-    logging.info(
-        f"Converted {n} internal links from ending with `.md` to "
-        "ending with `.html`."
-    )
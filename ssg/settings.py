@@ -77,39 +77,77 @@ import os
 import re
 import sys
 from copy import deepcopy
-from datetime import datetime
-from tkinter.filedialog import askdirectory
+from functools import cache
+from time import localtime
+from typing import TYPE_CHECKING
 
-import PySimpleGUI as sg  # https://pysimplegui.readthedocs.io/en/latest/
 from app_settings_dict import Settings  # https://pypi.org/project/app-settings-dict/
 
+if TYPE_CHECKING:
+    import PySimpleGUI as sg
+
+# PySimpleGUI and tkinter are imported inside the functions that use them so that
+# importing this module or validating valid settings does not load them.
+
 
 def show_settings_window(settings: Settings) -> Settings:
     """Runs the settings menu and returns the settings.
 
+    The chosen settings are only filtered and validated when the save button is
+    pressed. The settings file is only rewritten if the settings changed or the
+    file does not exist yet.
+
     Parameters
     ----------
     settings : Settings
         The current application settings.
     """
+    import PySimpleGUI as sg
+
     window = create_settings_window(settings.dump_to_dict())
     new_settings_obj = deepcopy(settings)
-    settings_are_valid = False
-    while not settings_are_valid:
+    while True:
         event, new_settings_dict = window.read()
         if event == sg.WIN_CLOSED:
             sys.exit(0)
+        if event == "cancel":
+            window.close()
+            return settings
+        if event != "save":
+            continue
         new_settings_dict = nest_items(filter_items(new_settings_dict))
         new_settings_obj.load_from_dict(new_settings_dict)
-        settings_are_valid = validate_settings(new_settings_obj)
+        if validate_settings(new_settings_obj):
+            break
     window.close()
-    if event == "cancel":
+    unchanged = new_settings_obj.dump_to_dict() == settings.dump_to_dict()
+    if unchanged and os.path.exists(settings_file_path):
         return settings
     settings = new_settings_obj
-    settings.save()
+    save_settings(settings)
     return settings
 
 
+def save_settings(settings: Settings) -> None:
+    """Saves the settings without risking a partially written settings file.
+
+    The settings are saved to a temporary file that then replaces the settings
+    file, so the settings file is never left half written if saving fails.
+
+    Parameters
+    ----------
+    settings : Settings
+        The application settings to save.
+    """
+    temp_file_path = settings_file_path + ".tmp"
+    settings.settings_file_path = temp_file_path
+    try:
+        settings.save()
+    finally:
+        settings.settings_file_path = settings_file_path
+    os.replace(temp_file_path, settings_file_path)
+
+
 def request_site_folder_path() -> str:
     """Prompts the user for the site's root folder path.
 
@@ -118,6 +156,10 @@ def request_site_folder_path() -> str:
     str
         The path to the site's root folder.
     """
+    from tkinter.filedialog import askdirectory
+
+    import PySimpleGUI as sg
+
     sg.PopupOK("Please select the folder that will contain the site's files.")
     return askdirectory(title="site folder", mustexist=True)
 
@@ -130,13 +172,18 @@ def request_zettelkasten_path() -> str:
     str
         The path to the zettelkasten folder.
     """
+    from tkinter.filedialog import askdirectory
+
+    import PySimpleGUI as sg
+
     sg.PopupOK("Please select the folder that contains the zettelkasten.")
     return askdirectory(title="zettelkasten folder", mustexist=True)
 
 
 settings_folder_path = os.path.dirname(os.path.abspath(__file__))
 settings_file_path = os.path.join(settings_folder_path, "settings.json")
-this_year = datetime.now().year
+this_year = localtime().tm_year
+default_published_tag_pattern = r"#(?<=\s#)published(?=\s)"
 settings = Settings(
     settings_file_path=settings_file_path,
     prompt_user_for_all_settings=show_settings_window,
@@ -163,14 +210,14 @@ settings = Settings(
                     r"(?<=]\()(?:file://)?(?:[a-zA-Z]:|/)"
                     r"[^\n]*?([^\\/\n]+\.[a-zA-Z0-9_-]+)(?=\))"
                 ),
-                "link path": re.compile(r"(?<=]\().+(?=\))"),
+                "link path": re.compile(r"(?<=]\()[^()\n]+(?=\))"),
                 "h1 content": re.compile(r"^# (.+)$"),
-                "md ext in link": re.compile(r"(?i)(?<=\S)\.m(d|arkdown)(?=\))"),
+                "md ext in link": re.compile(r"(?i)\.(?<=\S\.)m(d|arkdown)(?=\))"),
                 "md link": re.compile(r"\[(.+)]\((.+)\)"),
-                "published tag": re.compile(r"(?<=\s)#published(?=\s)"),
+                "published tag": re.compile(default_published_tag_pattern),
                 "single codeblock": re.compile(r"(`[^`]+?`)"),
-                "tag": re.compile(r"(?<=\s)#[a-zA-Z0-9_-]+"),
-                "triple codeblock": re.compile(r"(?<=\n)(`{3}(.|\n)*?(?<=\n)`{3})"),
+                "tag": re.compile(r"#(?<=\s#)[a-zA-Z0-9_-]+"),
+                "triple codeblock": re.compile(r"(?<=\n)`{3}[\s\S]*?\n`{3}"),
                 "zk id": re.compile(r"(\d{14})"),
             },
         ),
@@ -189,6 +236,9 @@ settings = Settings(
         "zk link start": "[[",
     },
 )
+setting_keys = frozenset(settings.data).union(
+    f"patterns.{key}" for key in settings["patterns"].data
+)
 
 
 def get_zk_link_contents_pattern() -> re.Pattern:
@@ -196,19 +246,54 @@ def get_zk_link_contents_pattern() -> re.Pattern:
 
     The pattern must contain either 0 or 1 capture groups.
     """
-    zk_link_start = re.escape(settings["zk link start"])
-    zk_link_end = re.escape(settings["zk link end"])
+    return compile_zk_link_contents_pattern(
+        settings["zk link start"], settings["zk link end"]
+    )
+
+
+@cache
+def compile_zk_link_contents_pattern(
+    zk_link_start: str, zk_link_end: str
+) -> re.Pattern:
+    """Compiles the pattern of the contents of a zettelkasten link.
+
+    Parameters
+    ----------
+    zk_link_start : str
+        The text that indicates the start of an internal zettelkasten link.
+    zk_link_end : str
+        The text that indicates the end of an internal zettelkasten link.
+    """
+    zk_link_start = re.escape(zk_link_start)
+    zk_link_end = re.escape(zk_link_end)
     return re.compile(f"{zk_link_start}(.+?){zk_link_end}")
 
 
 def get_zk_id_not_in_link_pattern() -> re.Pattern:
     """Gets the pattern of a zettel ID that is not in a zettelkasten link."""
-    zk_link_start = re.escape(settings["zk link start"])
-    zk_id_pattern = settings["patterns"]["zk id"].pattern
+    return compile_zk_id_not_in_link_pattern(
+        settings["zk link start"], settings["patterns"]["zk id"].pattern
+    )
+
+
+@cache
+def compile_zk_id_not_in_link_pattern(
+    zk_link_start: str, zk_id_pattern: str
+) -> re.Pattern:
+    """Compiles the pattern of a zettel ID that is not in a zettelkasten link.
+
+    Parameters
+    ----------
+    zk_link_start : str
+        The text that indicates the start of an internal zettelkasten link.
+    zk_id_pattern : str
+        The uncompiled pattern of a zettel ID.
+    """
+    zk_link_start = re.escape(zk_link_start)
     return re.compile(rf"(?<!\\)(?<!{zk_link_start}){zk_id_pattern}")
 
 
-def create_settings_window(settings: dict) -> sg.Window:
+def create_settings_window(settings: dict) -> "sg.Window":
     """Creates and displays the settings menu.
 
     Parameters
@@ -216,6 +301,8 @@ def create_settings_window(settings: dict) -> sg.Window:
     settings : dict
         The settings data dictionary.
     """
+    import PySimpleGUI as sg
+
     sg.theme("DarkAmber")
 
     general_tab_layout = [
@@ -243,16 +330,15 @@ def create_settings_window(settings: dict) -> sg.Window:
     ]
 
     color_tab_layout = [
-        create_color_chooser(
-            "body background color: ", "body background color", settings
-        ),
-        create_color_chooser(
-            "header background color: ", "header background color", settings
-        ),
-        create_color_chooser("header text color: ", "header text color", settings),
-        create_color_chooser("header hover color: ", "header hover color", settings),
-        create_color_chooser("body link color: ", "body link color", settings),
-        create_color_chooser("body hover color: ", "body hover color", settings),
+        create_color_chooser(f"{key}: ", key, settings)
+        for key in (
+            "body background color",
+            "header background color",
+            "header text color",
+            "header hover color",
+            "body link color",
+            "body hover color",
+        )
     ]
 
     layout = [
@@ -287,12 +373,10 @@ def create_text_chooser(title: str, key: str, settings: dict) -> list:
     settings : dict
         The settings data dictionary.
     """
-    try:
-        default_text = settings[key.split(".")[-1]]
-    except KeyError:
-        default_text = settings[key.split(".")[-1]] = ""
-    finally:
-        return [sg.Text(title), sg.Input(key=key, default_text=default_text)]
+    import PySimpleGUI as sg
+
+    default_text = settings.setdefault(key.split(".")[-1], "")
+    return [sg.Text(title), sg.Input(key=key, default_text=default_text)]
 
 
 def create_checkbox(title: str, key: str, settings: dict) -> list:
@@ -307,6 +391,8 @@ def create_checkbox(title: str, key: str, settings: dict) -> list:
     settings : dict
         The settings data dictionary.
     """
+    import PySimpleGUI as sg
+
     return [sg.Checkbox(title, key=key, default=settings[key])]
 
 
@@ -322,6 +408,8 @@ def create_folder_chooser(title: str, key: str, settings: dict) -> list:
     settings : dict
         The settings data dictionary.
     """
+    import PySimpleGUI as sg
+
     return [
         sg.Text(title),
         sg.FolderBrowse(target=key),
@@ -341,6 +429,8 @@ def create_color_chooser(title: str, key: str, settings: dict) -> list:
     settings : dict
         The settings data dictionary.
     """
+    import PySimpleGUI as sg
+
     return [
         sg.Text(title),
         sg.ColorChooserButton("choose", target=key),
@@ -349,22 +439,17 @@ def create_color_chooser(title: str, key: str, settings: dict) -> list:
 
 
 def filter_items(settings: dict) -> dict:
-    """Removes some dict items automatically generated by PySimpleGUI.
+    """Removes the dict items automatically generated by PySimpleGUI.
 
-    Removes all items with keys that are not strings or that start with
-    an uppercase letter.
+    Removes all items with keys that are not in setting_keys, such as the keys of
+    the tabs and the folder and color chooser buttons.
 
     Parameters
     ----------
     settings : dict
         The settings to filter.
     """
-    new_settings = dict()
-    for key, value in settings.items():
-        if isinstance(key, str):
-            if key[0].islower():
-                new_settings[key] = value
-    return new_settings
+    return {key: value for key, value in settings.items() if key in setting_keys}
 
 
 def nest_items(settings: dict) -> dict:
@@ -397,17 +482,17 @@ def validate_settings(settings: Settings) -> bool:
         The settings to validate.
     """
     if "patterns" in settings and settings["patterns"]["zk id"].groups > 1:
-        sg.popup("The ID regular expression must have one or no capturing groups.")
+        _show_error("The ID regular expression must have one or no capturing groups.")
         return False
     if not os.path.exists(settings["zettelkasten path"]) or not os.path.isdir(
         settings["zettelkasten path"]
     ):
-        sg.popup("The zettelkasten path does not exist.")
+        _show_error("The zettelkasten path does not exist.")
         return False
     if not os.path.exists(settings["site folder path"]) or not os.path.isdir(
         settings["site folder path"]
     ):
-        sg.popup("The site folder path does not exist.")
+        _show_error("The site folder path does not exist.")
         return False
     this_dir, _ = os.path.split(__file__)
     settings["site folder path"] = os.path.normpath(settings["site folder path"])
@@ -417,12 +502,12 @@ def validate_settings(settings: Settings) -> bool:
             "Error: the zettelkasten, the website's files, and this program's files"
             " should be in different folders."
         )
-        sg.popup(error_message)
+        _show_error(error_message)
         return False
     for key, value in settings.items():
         if isinstance(value, str):
             if not value and key != "internal html link prefix":
-                sg.popup(
+                _show_error(
                     'Each setting must be given a value, except the "internal html link'
                     ' prefix" setting.'
                 )
@@ -430,4 +515,20 @@ def validate_settings(settings: Settings) -> bool:
     return True
 
 
+def _show_error(message: str) -> None:
+    """Shows a popup with an error message.
+
+    PySimpleGUI is only imported here so that validating valid settings does not
+    load it.
+
+    Parameters
+    ----------
+    message : str
+        The error message to show.
+    """
+    import PySimpleGUI as sg
+
+    sg.popup(message)
+
+
 settings.load(fallback_option="prompt user")
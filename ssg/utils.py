@@ -3,12 +3,14 @@ import os
 import re
 import shutil
 import sys
+from pathlib import Path
+from typing import Callable
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
-import PySimpleGUI as sg
-
 from ssg.settings import settings
 
 
@@ -27,6 +29,8 @@ def show_progress(percentage: Union[int, float]) -> None:
         The percentage of the progress bar to fill. This number will be
         rounded to the nearest integer.
     """
+    import PySimpleGUI as sg
+
     sg.one_line_progress_meter(
         "generating the site", int(percentage), 100, "progress meter"
     )
@@ -66,19 +70,18 @@ def get_file_contents(absolute_path: str, encoding: str) -> str:
     encoding : str
         The encoding of the file.
     """
-    with open(absolute_path, "r", encoding=encoding) as file:
-        try:
-            contents = file.read()
-        except UnicodeDecodeError as e:
-            logging.error(f"UnicodeDecodeError: {e}")
-            print(f"UnicodeDecodeError: {e}")
-            sg.popup(
-                "Error: one or more symbols cannot not be decoded "
-                f"as unicode in file {absolute_path}"
-            )
-            sys.exit(1)
-        else:
-            return contents
+    try:
+        return Path(absolute_path).read_text(encoding=encoding)
+    except UnicodeDecodeError as e:
+        logging.error(f"UnicodeDecodeError: {e}")
+        print(f"UnicodeDecodeError: {e}")
+        import PySimpleGUI as sg
+
+        sg.popup(
+            "Error: one or more symbols cannot not be decoded "
+            f"as unicode in file {absolute_path}"
+        )
+        sys.exit(1)
 
 
 def replace_pattern(
@@ -108,45 +111,136 @@ def replace_pattern(
         Assumes the compiled pattern is for searching for file paths but will
         sometimes match other things too.
     """
-    total_replaced = 0
+    return replace_patterns(
+        [(compiled_pattern, replacement, file_must_exist)], file_paths, encoding
+    )[0]
+
+
+def replace_patterns(
+    replacements: List[Tuple[re.Pattern, Union[str, Callable], bool]],
+    file_paths: List[str],
+    encoding: str = "utf8",
+) -> List[int]:
+    """Replaces multiple regex patterns in multiple files
+
+    Each file is read and written at most once no matter how many patterns
+    there are. The patterns are applied in order. Returns the total number of
+    replacements made for each pattern, in the same order as the patterns.
 
+    Parameters
+    ----------
+    replacements : List[Tuple[re.Pattern, Union[str, Callable], bool]]
+        Each tuple has a compiled regex pattern to search for, the string to
+        replace it with (which can be a regex group reference) or a function
+        that takes a match and returns its replacement, and whether any file
+        paths matched by the pattern must exist (see replace_pattern's
+        file_must_exist parameter).
+    file_paths : List[str]
+        The paths to the files to search in.
+    encoding : str
+        The encoding of the files.
+    """
+    totals_replaced = [0] * len(replacements)
     for file_path in file_paths:
         contents = get_file_contents(file_path, encoding)
+        contents, n_replaced = replace_patterns_in_text(replacements, contents)
+        for i, n in enumerate(n_replaced):
+            totals_replaced[i] += n
+        if any(n_replaced):
+            Path(file_path).write_text(contents, encoding=encoding)
+    return totals_replaced
 
-        # Temporarily remove any code blocks from contents.
-        triple_codeblocks = settings["patterns"]["triple codeblock"].findall(contents)
-        if len(triple_codeblocks):
-            contents = settings["patterns"]["triple codeblock"].sub("␝", contents)
 
-        single_codeblocks = settings["patterns"]["single codeblock"].findall(contents)
-        if len(single_codeblocks):
-            contents = settings["patterns"]["single codeblock"].sub("␞", contents)
+def replace_patterns_in_text(
+    replacements: List[Tuple[re.Pattern, Union[str, Callable], bool]], contents: str
+) -> Tuple[str, List[int]]:
+    """Replaces multiple regex patterns in a string, skipping code blocks
 
-        # Replace the pattern.
+    Returns the new string and the number of replacements made for each
+    pattern, in the same order as the patterns.
+
+    Parameters
+    ----------
+    replacements : List[Tuple[re.Pattern, Union[str, Callable], bool]]
+        The patterns, their replacements, and whether any file paths they match
+        must exist, as described in replace_patterns.
+    contents : str
+        The string to replace the patterns in.
+    """
+    triple_codeblock_pattern: re.Pattern = settings["patterns"]["triple codeblock"]
+    single_codeblock_pattern: re.Pattern = settings["patterns"]["single codeblock"]
+
+    # Temporarily remove any code blocks from contents.
+    triple_codeblocks = [m[0] for m in triple_codeblock_pattern.finditer(contents)]
+    if len(triple_codeblocks):
+        contents = triple_codeblock_pattern.sub("␝", contents)
+
+    single_codeblocks = single_codeblock_pattern.findall(contents)
+    if len(single_codeblocks):
+        contents = single_codeblock_pattern.sub("␞", contents)
+
+    # Replace the patterns.
+    n_replaced: List[int] = []
+    for compiled_pattern, replacement, file_must_exist in replacements:
         if not file_must_exist:
-            contents, n_replaced = compiled_pattern.subn(replacement, contents)
+            contents, n = compiled_pattern.subn(replacement, contents)
         else:
-            contents, n_replaced = replace_file_paths(
-                compiled_pattern, replacement, contents
-            )
-        total_replaced += n_replaced
+            contents, n = replace_file_paths(compiled_pattern, replacement, contents)
+        n_replaced.append(n)
 
-        # Put back the code blocks.
-        for single_codeblock in single_codeblocks:
-            contents = re.sub(
-                r"␞", single_codeblock.replace("\\", r"\\"), contents, count=1
-            )
-        for triple_codeblock in triple_codeblocks:
-            contents = re.sub(
-                r"␝", triple_codeblock[0].replace("\\", r"\\"), contents, count=1
-            )
+    # Put back the code blocks.
+    for single_codeblock in single_codeblocks:
+        contents = contents.replace("␞", single_codeblock, 1)
+    for triple_codeblock in triple_codeblocks:
+        contents = contents.replace("␝", triple_codeblock, 1)
 
-        # Save changes.
-        if n_replaced > 0:
-            with open(file_path, "w", encoding=encoding) as file:
-                file.write(contents)
+    return contents, n_replaced
 
-    return total_replaced
+
+# Numeric backreferences and conditional references to numbered groups, which
+# would refer to different groups once their pattern is inside a combined one.
+numeric_group_reference_pattern = re.compile(r"\\[1-9]|\(\?\(\d")
+inline_flags_pattern = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+def combine_patterns(patterns: Dict[str, re.Pattern]) -> Optional[re.Pattern]:
+    """Combines multiple compiled patterns into one pattern of alternatives
+
+    Each pattern becomes a named group so that a match's ``lastgroup`` is the
+    name of the pattern that matched. Any global inline flags such as ``(?i)``
+    are turned into scoped flags that only apply to their own pattern. Returns
+    None if any of the patterns cannot be combined without changing what it
+    matches, such as a pattern with numeric backreferences, inline flags that
+    are not at its start, or group names used by another pattern.
+
+    Parameters
+    ----------
+    patterns : Dict[str, re.Pattern]
+        The patterns to combine, keyed by the names to give their groups. The
+        order of the dict is the order in which the alternatives are tried.
+    """
+    alternatives: List[str] = []
+    for name, pattern in patterns.items():
+        body = re.sub(r"^(?:\(\?[aiLmsux]+\))+", "", pattern.pattern)
+        has_numeric_reference = numeric_group_reference_pattern.search(body)
+        if has_numeric_reference or inline_flags_pattern.search(body):
+            return None
+        flags = "".join(
+            letter
+            for flag, letter in (
+                (re.A, "a"),
+                (re.I, "i"),
+                (re.M, "m"),
+                (re.S, "s"),
+                (re.X, "x"),
+            )
+            if pattern.flags & flag
+        )
+        alternatives.append(f"(?P<{name}>(?{flags}:{body}))")
+    try:
+        return re.compile("|".join(alternatives))
+    except re.error:
+        return None
 
 
 def replace_file_paths(
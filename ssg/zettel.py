@@ -1,4 +1,8 @@
 import os
+from functools import cached_property
+from pathlib import Path
+from typing import Dict
+from typing import FrozenSet
 from typing import List
 from typing import Optional
 
@@ -9,18 +13,30 @@ from ssg.settings import settings
 
 
 class Zettel:
-    def __init__(self, zettel_path: str):
+    def __init__(self, zettel_path: str, contents: Optional[str] = None):
+        """Creates a zettel from a markdown file.
+
+        Parameters
+        ----------
+        zettel_path : str
+            The path to the zettel's file.
+        contents : str, None
+            The contents of the zettel's file, if they have already been read.
+            If None, the file is read once here.
+        """
+        if contents is None:
+            contents = Path(zettel_path).read_text(encoding="utf8")
         self.path: str = zettel_path
         self.folder_path: str = os.path.dirname(zettel_path)
         self.file_name_and_ext: str = os.path.split(self.path)[1]
         self.file_name: str = os.path.splitext(self.file_name_and_ext)[0]
-        self.id: Optional[str] = self.__get_zettel_id(self.path, self.file_name)
-        self.title: str = self.__get_zettel_title(self.path, self.file_name_and_ext)
+        self.id: Optional[str] = self.__get_zettel_id(contents, self.file_name)
+        self.title: str = self.__get_zettel_title(contents, self.file_name_and_ext)
         self.link: str = self.__get_zettel_link(self.file_name, self.id, self.title)
         self.alt_link: Optional[str] = self.__get_zettel_name_link(self.file_name)
-        self.tags: List[str] = self.__get_zettel_tags(self.path)
+        self.tags: FrozenSet[str] = self.__get_zettel_tags(contents)
 
-    def __get_zettel_id(self, path: str, file_name: str) -> Optional[str]:
+    def __get_zettel_id(self, contents: str, file_name: str) -> Optional[str]:
         """Gets the zettel's ID, if it has one.
 
         Checks the file's name for an ID first, and then checks the contents of
@@ -30,13 +46,11 @@ class Zettel:
         match = settings["patterns"]["zk id"].match(file_name)
         if match:
             return match[0]
-        with open(path, "r", encoding="utf8") as file:
-            contents = file.read()
         match = get_zk_id_not_in_link_pattern().search(contents)
         if match:
             return match[0]
 
-    def __get_zettel_title(self, path: str, file_name_and_ext: str) -> str:
+    def __get_zettel_title(self, contents: str, file_name_and_ext: str) -> str:
         """Gets the zettel's title.
 
         The title is the content of the first header level 1, or the file name
@@ -46,8 +60,6 @@ class Zettel:
             return "categorical index"
         elif file_name_and_ext == "about.md":
             return "about"
-        with open(path, "r", encoding="utf8") as file:
-            contents = file.read()
         match = settings["patterns"]["h1 content"].search(contents)
         if match:
             return match[0]
@@ -72,26 +84,27 @@ class Zettel:
         """
         return f"[[{file_name}]]"
 
-    def __get_zettel_tags(self, path: str) -> List[str]:
-        """Gets all the tags in the zettel."""
-        with open(path, "r", encoding="utf8") as file:
-            contents = file.read()
+    def __get_zettel_tags(self, contents: str) -> FrozenSet[str]:
+        """Gets all the unique tags in the zettel."""
         tags: List[str] = settings["patterns"]["tag"].findall(contents)
-        return tags
+        return frozenset(tags)
+
+    @cached_property
+    def is_root_page(self) -> bool:
+        """Whether the zettel is one of the pages in the site's root folder."""
+        return self.file_name in settings["root pages"]
 
     def create_html_file(self) -> str:
         """Creates one HTML file from a markdown file in the same folder.
 
         Overwrites an HTML file if it happens to have the same name.
-        Returns the new HTML file's path.
+        Returns the new HTML file's normalized path.
         """
-        with open(self.path, "r", encoding="utf8") as file:
-            md_text = file.read()
+        md_text = Path(self.path).read_text(encoding="utf8")
         html_text = HTMLConverter(md_text)
         html_path = self.create_html_path(self.path)
-        with open(html_path, "w", encoding="utf8") as file:
-            file.write(html_text)
-        return html_path
+        Path(html_path).write_text(html_text, encoding="utf8")
+        return os.path.normpath(html_path)
 
     def create_html_path(self, path: str) -> str:
         """Creates an HTML file path from a corresponding md file path."""
@@ -132,3 +145,28 @@ def get_zettel_by_id_or_file_name(
     for zettel in zettels:
         if zettel.file_name_and_ext == identifier:
             return zettel
+
+
+def get_zettels_by_identifier(zettels: List[Zettel]) -> Dict[str, Zettel]:
+    """Maps every ID and file name that a zettel link could refer to to a zettel.
+
+    Lookups in the returned dict give the same results as
+    get_zettel_by_id_or_file_name: IDs take priority over file names without
+    extensions, which take priority over file names with extensions, and earlier
+    zettels take priority over later ones. Any identifier not in the returned
+    dict cannot be found, so links to it are broken.
+
+    Parameters
+    ----------
+    zettels : List[Zettel]
+        The zettels to map.
+    """
+    zettels_by_identifier: Dict[str, Zettel] = dict()
+    for zettel in reversed(zettels):
+        zettels_by_identifier[zettel.file_name_and_ext] = zettel
+    for zettel in reversed(zettels):
+        zettels_by_identifier[zettel.file_name] = zettel
+    for zettel in reversed(zettels):
+        if zettel.id is not None:
+            zettels_by_identifier[zettel.id] = zettel
+    return zettels_by_identifier
@@ -0,0 +1,19 @@
+from typing import Iterable
+from typing import Optional
+
+from ssg.zettel import Zettel
+
+
+class Zettel_for_testing(Zettel):
+    def __init__(
+        self,
+        file_name: str = "",
+        tags: Iterable[str] = (),
+        id: Optional[str] = None,
+        title: Optional[str] = None,
+    ):
+        self.file_name = file_name
+        self.id = id
+        self.title = title or file_name
+        self.link = f"[[{id}]] {title}" if id else f"[[{file_name}]]"
+        self.tags = frozenset(tags)
@@ -0,0 +1,67 @@
+import os
+import re
+
+from ssg.generate_site import copy_attachments
+from ssg.generate_site import copy_zettels_to_site_folder
+from ssg.generate_site import get_contents_of_zettels_to_publish
+from ssg.generate_site import get_zettel_link_paths
+from ssg.reformat_zettels import reformat_zettels
+from ssg.settings import settings
+from ssg.zettel import Zettel
+
+
+def test_copy_attachments_does_not_change_linked_zettels(tmp_path):
+    zettelkasten_path = tmp_path / "zettelkasten"
+    site_path = tmp_path / "site"
+    site_pages_path = site_path / "pages"
+    zettelkasten_path.mkdir()
+    site_pages_path.mkdir(parents=True)
+    b_contents = "# b\n #secret #published\n"
+    (zettelkasten_path / "a.md").write_text("# a\n #published [b](b.md)\n")
+    (zettelkasten_path / "b.md").write_text(b_contents)
+    zettels = [
+        Zettel(str(zettelkasten_path / "a.md")),
+        Zettel(str(zettelkasten_path / "b.md")),
+    ]
+    zettels = copy_zettels_to_site_folder(zettels, str(site_path), str(site_pages_path))
+    copy_attachments(zettels, str(site_pages_path))
+    reformat_zettels(zettels)
+    assert (zettelkasten_path / "b.md").read_text() == b_contents
+
+
+def test_get_contents_of_zettels_to_publish_with_custom_pattern(tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        settings["patterns"],
+        "published tag",
+        re.compile(r"(?i)(?<=\s)#published(?=\s)"),
+    )
+    (tmp_path / "a.md").write_text("# a\n #Published\n")
+    (tmp_path / "b.md").write_text("# b\n #draft\n")
+    assert get_contents_of_zettels_to_publish(str(tmp_path)) == {
+        str(tmp_path / "a.md"): "# a\n #Published\n"
+    }
+
+
+def test_get_contents_of_zettels_to_publish_after_pattern_change(tmp_path, monkeypatch):
+    (tmp_path / "a.md").write_text("# a\n #Published\n")
+    assert get_contents_of_zettels_to_publish(str(tmp_path)) == {}
+    monkeypatch.setitem(
+        settings["patterns"],
+        "published tag",
+        re.compile(r"(?i)(?<=\s)#published(?=\s)"),
+    )
+    assert get_contents_of_zettels_to_publish(str(tmp_path)) == {
+        str(tmp_path / "a.md"): "# a\n #Published\n"
+    }
+
+
+def test_get_zettel_link_paths_with_custom_pattern(tmp_path, monkeypatch):
+    monkeypatch.setitem(
+        settings["patterns"], "link path", re.compile(r"(?<=]\()\w+\.png(?=\))")
+    )
+    (tmp_path / "ä.png").write_bytes(b"")
+    (tmp_path / "b.txt").write_bytes(b"")
+    (tmp_path / "a.md").write_text("# a\n ![x](ä.png) [y](b.txt)\n", encoding="utf8")
+    assert get_zettel_link_paths(Zettel(str(tmp_path / "a.md"))) == [
+        os.path.normpath(str(tmp_path / "ä.png"))
+    ]
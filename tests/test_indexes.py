@@ -0,0 +1,55 @@
+from ssg.indexes import create_alphabetical_index
+from ssg.indexes import create_categorical_indexes
+from ssg.indexes import create_chronological_index
+from tests.conftest import Zettel_for_testing
+
+
+def test_create_categorical_indexes():
+    z1 = Zettel_for_testing("positive health", ["#published", "#health"])
+    z2 = Zettel_for_testing("emergence", ["#published", "#science", "#health"])
+    z3 = Zettel_for_testing("unlinked", ["#published"])
+    z4 = Zettel_for_testing("about", ["#published", "#health"])
+    assert create_categorical_indexes([z1, z2, z3, z4], ["#health", "#science"]) == {
+        "#health": "* [[positive health]]\n* [[emergence]]",
+        "#science": "* [[emergence]]",
+        "#other": "* [[unlinked]]",
+    }
+
+
+def test_create_categorical_indexes_without_other():
+    z1 = Zettel_for_testing("positive health", ["#published", "#health"])
+    assert create_categorical_indexes([z1], ["#health", "#science"]) == {
+        "#health": "* [[positive health]]",
+        "#science": "",
+    }
+
+
+def test_create_alphabetical_index():
+    z1 = Zettel_for_testing("20210919100142", id="20210919100142", title="Zebra")
+    z2 = Zettel_for_testing("apple")
+    z3 = Zettel_for_testing("index")
+    assert create_alphabetical_index([z1, z2, z3]) == (
+        "## alphabetical index\n\n* [[apple]]\n* [[20210919100142]] Zebra"
+    )
+
+
+def test_create_chronological_index():
+    z1 = Zettel_for_testing("20200522233055", id="20200522233055", title="older")
+    z2 = Zettel_for_testing("20210919100142", id="20210919100142", title="newer")
+    z3 = Zettel_for_testing("undated")
+    z4 = Zettel_for_testing("about")
+    assert create_chronological_index([z1, z2, z3, z4], False) == (
+        "_Dates shown here are the original file creation dates, not necessarily"
+        " latest edit or post dates._\n\n"
+        "* 2021/09/19 [[20210919100142]] newer\n"
+        "* 2020/05/22 [[20200522233055]] older"
+        "\n\n### undated pages\n\n* [[undated]]"
+    )
+
+
+def test_create_chronological_index_without_dates():
+    z1 = Zettel_for_testing("20200522233055", id="20200522233055", title="older")
+    z2 = Zettel_for_testing("20210919100142", id="20210919100142", title="newer")
+    assert create_chronological_index([z1, z2], True) == (
+        "* [[20210919100142]] newer\n* [[20200522233055]] older"
+    )
@@ -0,0 +1,48 @@
+import re
+
+from ssg.utils import combine_patterns
+from ssg.utils import replace_patterns_in_text
+
+
+def test_combine_patterns():
+    pattern = combine_patterns(
+        {
+            "tag": re.compile(r"(?<=\s)#[a-zA-Z0-9_-]+"),
+            "md_ext": re.compile(r"(?i)(?<=\S)\.m(d|arkdown)(?=\))"),
+        }
+    )
+    matches = pattern.finditer("a #tag [x](y.MD) [z](w.markdown) #TAG")
+    assert [(m.lastgroup, m[0]) for m in matches] == [
+        ("tag", "#tag"),
+        ("md_ext", ".MD"),
+        ("md_ext", ".markdown"),
+        ("tag", "#TAG"),
+    ]
+
+
+def test_combine_patterns_keeps_flags_scoped():
+    pattern = combine_patterns(
+        {"upper": re.compile(r"A"), "lower": re.compile(r"(?i)b")}
+    )
+    assert [m.lastgroup for m in pattern.finditer("aAbB")] == [
+        "upper",
+        "lower",
+        "lower",
+    ]
+
+
+def test_replace_patterns_in_text_skips_codeblocks():
+    contents = "a #x\n```\ncode #x\n```\nb `#x` #x"
+    assert replace_patterns_in_text([(re.compile(r"#x"), "#y", False)], contents) == (
+        "a #y\n```\ncode #x\n```\nb `#x` #y",
+        [2],
+    )
+
+
+def test_combine_patterns_keeps_ascii_flag():
+    pattern = combine_patterns({"word": re.compile(r"(?a)\w+")})
+    assert pattern.findall("é") == []
+
+
+def test_combine_patterns_rejects_numeric_backreferences():
+    assert combine_patterns({"double": re.compile(r"(\w)\1")}) is None
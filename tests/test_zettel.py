@@ -1,10 +1,6 @@
 from ssg.zettel import get_zettel_by_id_or_file_name
-from ssg.zettel import Zettel
-
-
-class Zettel_for_testing(Zettel):
-    def __init__(self):
-        pass
+from ssg.zettel import get_zettels_by_identifier
+from tests.conftest import Zettel_for_testing
 
 
 def test___get_zettel_link_with_ID_in_name_and_content():
@@ -76,3 +72,49 @@ def test_get_nonexistent_zettel():
     z1.file_name_and_ext = "positive health.md"
     z2.file_name_and_ext = "emergence.markdown"
     assert get_zettel_by_id_or_file_name("20200522233056", [z1, z2]) is None
+
+
+def test_get_zettels_by_identifier_keys():
+    z1 = Zettel_for_testing()
+    z2 = Zettel_for_testing()
+    z1.id = "20210919100142"
+    z2.id = None
+    z1.file_name = "positive health"
+    z2.file_name = "emergence"
+    z1.file_name_and_ext = "positive health.md"
+    z2.file_name_and_ext = "emergence.markdown"
+    assert get_zettels_by_identifier([z1, z2]).keys() == {
+        "20210919100142",
+        "positive health",
+        "positive health.md",
+        "emergence",
+        "emergence.markdown",
+    }
+
+
+def test_get_zettels_by_identifier():
+    z1 = Zettel_for_testing()
+    z2 = Zettel_for_testing()
+    z3 = Zettel_for_testing()
+    z1.id = None
+    z2.id = None
+    z3.id = "20200522233055"
+    z1.file_name = "emergence.md"
+    z2.file_name = "emergence"
+    z3.file_name = "20200522233055"
+    z1.file_name_and_ext = "emergence.md.md"
+    z2.file_name_and_ext = "emergence.md"
+    z3.file_name_and_ext = "20200522233055.md"
+    zettels = [z1, z2, z3]
+    zettels_by_identifier = get_zettels_by_identifier(zettels)
+    for identifier in (
+        "emergence",
+        "emergence.md",
+        "emergence.md.md",
+        "20200522233055",
+        "20200522233055.md",
+        "other",
+    ):
+        assert get_zettel_by_id_or_file_name(
+            identifier, zettels
+        ) == zettels_by_identifier.get(identifier)